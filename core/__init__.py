@@ -1,13 +1,25 @@
 """Core modules for parallel ESP32 flasher."""
 from .config import Config
-from .flasher import ESP32Flasher, FlashResult
 from .device_manager import DeviceManager
 from .logger import FlashLogger
 from .db import FlashDatabase
 
+# The flasher needs esptool and pyserial; import it on first use so tools that
+# only discover devices (e.g. test_setup.py) work without them
+_FLASHER_NAMES = ('ESP32Flasher', 'FlashCancelled', 'FlashResult')
+
+
+def __getattr__(name):
+    if name in _FLASHER_NAMES:
+        from . import flasher
+        return getattr(flasher, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     'Config',
     'ESP32Flasher',
+    'FlashCancelled',
     'FlashResult',
     'DeviceManager',
     'FlashLogger',
@@ -1,12 +1,28 @@
 """Configuration management for parallel ESP32 flasher."""
 import yaml
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+
+# Prefer the libyaml C bindings; fall back to the pure-Python implementation
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
 
 
 class Config:
     """Manages application configuration from YAML file."""
 
+    # Settings are snapshotted into slots on load so reads are plain attribute access
+    __slots__ = (
+        'config_path', '_config', 'baud_rate', 'chip', 'flash_offset', '_firmware_path',
+        'verify', 'max_workers', 'port_thread_affinity', 'mqtt_enabled', 'mqtt_broker',
+        'mqtt_topic'
+    )
+
+    # Parsed YAML keyed on (path, mtime_ns, size); shared across instances
+    _parse_cache: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+
     def __init__(self, config_path: str = "config.yaml"):
         self.config_path = Path(config_path)
         self._config: Dict[str, Any] = {}
@@ -17,50 +33,40 @@ class Config:
         if not self.config_path.exists():
             raise FileNotFoundError(f"Config file not found: {self.config_path}")
 
-        with open(self.config_path, 'r') as f:
-            self._config = yaml.safe_load(f)
+        st = self.config_path.stat()
+        key = (str(self.config_path.resolve()), st.st_mtime_ns, st.st_size)
+        cached = self._parse_cache.get(key)
+        if cached is None:
+            with open(self.config_path, 'r') as f:
+                cached = yaml.load(f, Loader=SafeLoader) or {}
+            self._parse_cache[key] = cached
+
+        # Copy so setters on this instance don't leak into the shared cache
+        self._config = dict(cached)
+
+        config = self._config
+        mqtt = config.get('mqtt') or {}  # an empty 'mqtt:' key loads as None
+        self.baud_rate: int = config.get('baud_rate', 921600)
+        self.chip: str = config.get('chip', 'esp32')
+        self.flash_offset: int = config.get('flash_offset', 0x1000)
+        self._firmware_path: str = config.get('firmware_path', 'static/firmware/firmware.bin')
+        self.verify: bool = config.get('verify', True)
+        self.max_workers: int = config.get('max_workers', 10)
+        self.port_thread_affinity: bool = config.get('port_thread_affinity', False)
+        self.mqtt_enabled: bool = mqtt.get('enabled', False)
+        self.mqtt_broker: str = mqtt.get('broker', 'localhost')
+        self.mqtt_topic: str = mqtt.get('topic', 'zflash/results')
 
     def save(self) -> None:
         """Save current configuration to YAML file."""
         with open(self.config_path, 'w') as f:
-            yaml.dump(self._config, f, default_flow_style=False)
-
-    @property
-    def baud_rate(self) -> int:
-        return self._config.get('baud_rate', 921600)
-
-    @property
-    def chip(self) -> str:
-        return self._config.get('chip', 'esp32')
-
-    @property
-    def flash_offset(self) -> int:
-        return self._config.get('flash_offset', 0x1000)
+            yaml.dump(self._config, f, Dumper=SafeDumper, default_flow_style=False)
 
     @property
     def firmware_path(self) -> str:
-        return self._config.get('firmware_path', 'static/firmware/firmware.bin')
+        return self._firmware_path
 
     @firmware_path.setter
     def firmware_path(self, value: str) -> None:
+        self._firmware_path = value
         self._config['firmware_path'] = value
-
-    @property
-    def verify(self) -> bool:
-        return self._config.get('verify', True)
-
-    @property
-    def max_workers(self) -> int:
-        return self._config.get('max_workers', 10)
-
-    @property
-    def mqtt_enabled(self) -> bool:
-        return self._config.get('mqtt', {}).get('enabled', False)
-
-    @property
-    def mqtt_broker(self) -> str:
-        return self._config.get('mqtt', {}).get('broker', 'localhost')
-
-    @property
-    def mqtt_topic(self) -> str:
-        return self._config.get('mqtt', {}).get('topic', 'zflash/results')
@@ -1,25 +1,68 @@
 """Database management for tracking flash operations."""
 import sqlite3
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional
 import csv
 
 
+# Hot statements kept as constants so sqlite3's per-connection statement
+# cache (keyed on SQL text) reuses the prepared form on every call
+_INSERT_SQL = """
+    INSERT INTO flash_history
+    (timestamp, port, mac, chip_type, status, duration, firmware, log_path, error_msg)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_RECENT_SQL = "SELECT * FROM flash_history ORDER BY timestamp DESC LIMIT ?"
+_STATS_SQL = "SELECT status, COUNT(*) as count FROM flash_history GROUP BY status"
+_STATS_SINCE_SQL = (
+    "SELECT status, COUNT(*) as count FROM flash_history WHERE timestamp >= ? GROUP BY status"
+)
+
+
 class FlashDatabase:
     """SQLite database for tracking flash operations and metrics."""
 
     def __init__(self, db_path: str = "static/flash_history.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.conn: Optional[sqlite3.Connection] = None
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._conn_lock = threading.Lock()
+        self._write_lock = threading.Lock()
         self._init_db()
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection for the calling thread, opened on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open and tune a new connection to the database."""
+        # Each connection stays on its opening thread; close() may run elsewhere
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+
+        # WAL lets readers proceed during writes; NORMAL sync skips the
+        # per-commit fsync of the rollback journal
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_spill=0")
+
+        with self._conn_lock:
+            self._connections.append(conn)
+        return conn
+
     def _init_db(self) -> None:
         """Initialize database with required tables."""
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
-
         cursor = self.conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS flash_history (
@@ -49,39 +92,60 @@ class FlashDatabase:
         error_msg: Optional[str] = None
     ) -> int:
         """Add a flash operation record."""
-        cursor = self.conn.cursor()
         timestamp = datetime.now().isoformat()
 
-        cursor.execute("""
-            INSERT INTO flash_history
-            (timestamp, port, mac, chip_type, status, duration, firmware, log_path, error_msg)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (timestamp, port, mac, chip_type, status, duration, firmware, log_path, error_msg))
+        with self._write_lock:
+            cursor = self.conn.execute(
+                _INSERT_SQL,
+                (timestamp, port, mac, chip_type, status, duration, firmware, log_path, error_msg)
+            )
 
-        self.conn.commit()
-        return cursor.lastrowid
+            self.conn.commit()
+            return cursor.lastrowid
+
+    def add_records(self, records: List[Dict]) -> None:
+        """Add several flash operation records in a single transaction.
+
+        Args:
+            records: Dicts keyed like the add_record() arguments, with an
+                optional 'timestamp' (ISO format, defaults to now)
+        """
+        if not records:
+            return
+
+        timestamp = datetime.now().isoformat()
+        rows = [
+            (
+                r.get('timestamp', timestamp), r['port'], r.get('mac'), r.get('chip_type'),
+                r['status'], r.get('duration'), r.get('firmware'), r.get('log_path'),
+                r.get('error_msg')
+            )
+            for r in records
+        ]
+
+        with self._write_lock:
+            self.conn.executemany(_INSERT_SQL, rows)
+
+            self.conn.commit()
+
+    def iter_recent_records(self, limit: int = 100) -> Iterator[sqlite3.Row]:
+        """Iterate recent flash records, newest first.
+
+        Rows are fetched lazily, so callers can stop early. Each row supports
+        both column-name and index access; use dict(row) for a plain dict.
+        """
+        yield from self.conn.execute(_RECENT_SQL, (limit,))
 
     def get_recent_records(self, limit: int = 100) -> List[Dict]:
         """Get recent flash records."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM flash_history
-            ORDER BY timestamp DESC
-            LIMIT ?
-        """, (limit,))
-
-        return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in self.iter_recent_records(limit)]
 
     def get_statistics(self, since: Optional[datetime] = None) -> Dict:
         """Get flash statistics."""
-        cursor = self.conn.cursor()
-
         if since:
-            query = "SELECT status, COUNT(*) as count FROM flash_history WHERE timestamp >= ? GROUP BY status"
-            cursor.execute(query, (since.isoformat(),))
+            cursor = self.conn.execute(_STATS_SINCE_SQL, (since.isoformat(),))
         else:
-            query = "SELECT status, COUNT(*) as count FROM flash_history GROUP BY status"
-            cursor.execute(query)
+            cursor = self.conn.execute(_STATS_SQL)
 
         stats = {row['status']: row['count'] for row in cursor.fetchall()}
 
@@ -104,22 +168,28 @@ class FlashDatabase:
         else:
             cursor.execute("SELECT * FROM flash_history ORDER BY timestamp DESC")
 
-        rows = cursor.fetchall()
-        if not rows:
+        # Stream rows straight from the cursor instead of materializing the table
+        first = cursor.fetchone()
+        if first is None:
             return
 
         with open(output_path, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-            writer.writeheader()
-            writer.writerows([dict(row) for row in rows])
+            writer = csv.writer(f)
+            writer.writerow([col[0] for col in cursor.description])
+            writer.writerow(first)
+            writer.writerows(cursor)
 
     def reset_statistics(self) -> None:
         """Clear all flash history records."""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM flash_history")
-        self.conn.commit()
+        with self._write_lock:
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM flash_history")
+            self.conn.commit()
 
     def close(self) -> None:
-        """Close database connection."""
-        if self.conn:
-            self.conn.close()
+        """Close all database connections."""
+        with self._conn_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
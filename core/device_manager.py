@@ -1,7 +1,11 @@
 """Device detection and hotplug monitoring."""
+import bisect
+import os
+import re
+import select
 import threading
-from typing import List, Callable, Optional, Set
-from pathlib import Path
+from fnmatch import translate
+from typing import List, Callable, Optional, Pattern, Set, Tuple
 import time
 
 
@@ -12,11 +16,25 @@ except ImportError:
     PYUDEV_AVAILABLE = False
 
 
+DEFAULT_PATTERNS = ['ttyUSB*', 'ttyACM*', 'cu.usbserial-*', 'cu.SLAB_USBtoUART*']
+
+# Scans taken this soon after a /dev change aren't memoized: directory mtimes
+# only advance per clock tick (per second on some filesystems), so a node
+# created later in the same tick wouldn't change the mtime the memo is keyed on
+MTIME_SETTLE_NS = 1_000_000_000
+
+
+def _compile_patterns(patterns: List[str]) -> Pattern[str]:
+    """Combine shell-style device patterns into a single regex."""
+    return re.compile('|'.join(translate(p) for p in patterns))
+
+
 class DeviceManager:
     """Manages USB device detection and hotplug events."""
 
     def __init__(self):
         self.devices: Set[str] = set()
+        self._devices_sorted: List[str] = []
         self.callbacks = {
             'add': [],
             'remove': []
@@ -24,6 +42,15 @@ class DeviceManager:
         self._monitor_thread: Optional[threading.Thread] = None
         self._running = False
         self.use_pyudev = PYUDEV_AVAILABLE
+        self._default_re = _compile_patterns(DEFAULT_PATTERNS)
+        # (/dev mtime, devices) of the last default-pattern scan, reused while
+        # the mtime is unchanged; one tuple so threads never see a torn pair
+        self._scan_memo: Optional[Tuple[int, List[str]]] = None
+
+    @property
+    def has_hotplug(self) -> bool:
+        """Whether monitoring is event driven (udev or kqueue) rather than polled."""
+        return self.use_pyudev or hasattr(select, 'kqueue')
 
     def scan_devices(self, patterns: List[str] = None) -> List[str]:
         """Scan for connected serial devices.
@@ -35,20 +62,58 @@ class DeviceManager:
             List of device paths
         """
         if patterns is None:
-            patterns = ['ttyUSB*', 'ttyACM*', 'cu.usbserial-*', 'cu.SLAB_USBtoUART*']
+            matcher = self._default_re
+        else:
+            matcher = _compile_patterns(patterns)
 
         devices = []
-        dev_dir = Path('/dev')
 
-        if not dev_dir.exists():
+        try:
+            mtime = os.stat('/dev').st_mtime_ns
+        except OSError:
             return devices
 
-        for pattern in patterns:
-            devices.extend([str(p) for p in dev_dir.glob(pattern)])
+        # /dev only changes mtime when nodes are created or removed; a refresh
+        # storm costs one stat per call, never a stale list
+        memo = self._scan_memo
+        if patterns is None and memo is not None and memo[0] == mtime:
+            return list(memo[1])
+
+        # Single directory pass; DirEntry caches the file type so no extra stats
+        try:
+            with os.scandir('/dev') as entries:
+                for entry in entries:
+                    if matcher.match(entry.name) and not entry.is_dir():
+                        devices.append(entry.path)
+        except OSError:
+            return devices
 
         devices.sort()
+        if patterns is None and time.time_ns() - mtime > MTIME_SETTLE_NS:
+            self._scan_memo = (mtime, devices[:])
         return devices
 
+    def _invalidate_scan(self) -> None:
+        """Force the next default scan to walk /dev."""
+        self._scan_memo = None
+
+    def _set_devices(self, devices: List[str]) -> None:
+        """Replace the known device set."""
+        self.devices = set(devices)
+        self._devices_sorted = sorted(self.devices)
+
+    def _add_device(self, device: str) -> None:
+        """Track a newly connected device, keeping the sorted view in order."""
+        self.devices.add(device)
+        bisect.insort(self._devices_sorted, device)
+        self._invalidate_scan()
+
+    def _remove_device(self, device: str) -> None:
+        """Forget a disconnected device."""
+        self.devices.discard(device)
+        self._devices_sorted.remove(device)
+        self._invalidate_scan()
+
     def register_callback(self, event: str, callback: Callable[[str], None]) -> None:
         """Register a callback for device events.
 
@@ -68,6 +133,8 @@ class DeviceManager:
 
         if self.use_pyudev:
             self._monitor_thread = threading.Thread(target=self._pyudev_monitor, daemon=True)
+        elif hasattr(select, 'kqueue'):
+            self._monitor_thread = threading.Thread(target=self._kqueue_monitor, daemon=True)
         else:
             self._monitor_thread = threading.Thread(target=self._poll_monitor, daemon=True)
 
@@ -84,14 +151,17 @@ class DeviceManager:
         context = pyudev.Context()
         monitor = pyudev.Monitor.from_netlink(context)
         monitor.filter_by(subsystem='tty')
+        # Listen before the initial scan so no event falls between the two
+        monitor.start()
 
         # Initial scan
-        current_devices = set(self.scan_devices())
-        self.devices = current_devices
+        self._set_devices(self.scan_devices())
 
-        for device in monitor:
-            if not self._running:
-                break
+        while self._running:
+            # Wait on the netlink socket; the timeout only bounds shutdown latency
+            device = monitor.poll(timeout=1.0)
+            if device is None:
+                continue
 
             device_path = device.device_node
             if not device_path:
@@ -99,39 +169,71 @@ class DeviceManager:
 
             if device.action == 'add':
                 if device_path not in self.devices:
-                    self.devices.add(device_path)
+                    self._add_device(device_path)
                     for callback in self.callbacks['add']:
                         callback(device_path)
 
             elif device.action == 'remove':
                 if device_path in self.devices:
-                    self.devices.remove(device_path)
+                    self._remove_device(device_path)
                     for callback in self.callbacks['remove']:
                         callback(device_path)
 
+    def _kqueue_monitor(self) -> None:
+        """Monitor devices using kqueue vnode events on /dev (macOS/BSD)."""
+        try:
+            fd = os.open('/dev', getattr(os, 'O_EVTONLY', os.O_RDONLY))
+        except OSError:
+            self._poll_monitor()
+            return
+
+        kq = select.kqueue()
+        try:
+            watch = select.kevent(
+                fd,
+                filter=select.KQ_FILTER_VNODE,
+                flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+                fflags=select.KQ_NOTE_WRITE
+            )
+            kq.control([watch], 0)
+
+            # Initial scan
+            self._set_devices(self.scan_devices())
+
+            while self._running:
+                # Block until /dev changes; the timeout only bounds shutdown latency
+                if kq.control(None, 1, 1.0):
+                    # The event is consumed (EV_CLEAR), so this scan must not be served from memo
+                    self._invalidate_scan()
+                    self._sync_devices(set(self.scan_devices()))
+        finally:
+            kq.close()
+            os.close(fd)
+
     def _poll_monitor(self) -> None:
         """Monitor devices using polling (fallback method)."""
         # Initial scan
-        self.devices = set(self.scan_devices())
+        self._set_devices(self.scan_devices())
 
         while self._running:
             time.sleep(1)  # Poll every second
-
-            current_devices = set(self.scan_devices())
-
-            # Detect added devices
-            added = current_devices - self.devices
-            for device in added:
-                self.devices.add(device)
-                for callback in self.callbacks['add']:
-                    callback(device)
-
-            # Detect removed devices
-            removed = self.devices - current_devices
-            for device in removed:
-                self.devices.discard(device)
-                for callback in self.callbacks['remove']:
-                    callback(device)
+            self._sync_devices(set(self.scan_devices()))
+
+    def _sync_devices(self, current_devices: Set[str]) -> None:
+        """Diff a fresh scan against known devices and fire callbacks."""
+        # Detect added devices
+        added = current_devices - self.devices
+        for device in added:
+            self._add_device(device)
+            for callback in self.callbacks['add']:
+                callback(device)
+
+        # Detect removed devices
+        removed = self.devices - current_devices
+        for device in removed:
+            self._remove_device(device)
+            for callback in self.callbacks['remove']:
+                callback(device)
 
     def get_devices(self) -> List[str]:
         """Get list of currently connected devices.
@@ -139,7 +241,7 @@ class DeviceManager:
         Returns:
             List of device paths
         """
-        return sorted(list(self.devices))
+        return list(self._devices_sorted)
 
     def refresh(self) -> List[str]:
         """Force refresh of device list.
@@ -147,6 +249,7 @@ class DeviceManager:
         Returns:
             Updated list of devices
         """
+        self._invalidate_scan()
         devices = self.scan_devices()
-        self.devices = set(devices)
+        self._set_devices(devices)
         return devices
@@ -1,13 +1,30 @@
 """ESP32 flasher module wrapping esptool functionality."""
-import subprocess
-import time
+import argparse
+import io
 import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Tuple, Callable
+from typing import Callable, Iterator, Optional, TextIO, Tuple
 from dataclasses import dataclass
+import esptool
 import serial
 
 
+# Lines of flash output kept on FlashResult.log_output for diagnostics
+LOG_TAIL_LINES = 200
+
+# esptool write_flash progress lines, e.g. "Writing at 0x00010000... (12 %)"
+_PROGRESS_RE = re.compile(r'\((\d+) %\)')
+
+
+class FlashCancelled(Exception):
+    """Raised from a progress callback to abort a flash in progress."""
+
+
 @dataclass
 class FlashResult:
     """Result of a flash operation."""
@@ -20,6 +37,110 @@ class FlashResult:
     log_output: str = ""
 
 
+class _ThreadOutput(io.TextIOBase):
+    """sys.stdout stand-in that hands each thread's prints to its own handler.
+
+    esptool reports everything through print() while several flashes run at
+    once; threads without a handler write through to the real stream.
+    """
+
+    def __init__(self, stream: TextIO):
+        super().__init__()
+        self.stream = stream
+        self._local = threading.local()
+
+    @contextmanager
+    def capture(self, on_line: Callable[[str], None]) -> Iterator[None]:
+        """Send complete lines printed by the calling thread to on_line."""
+        self._local.handler = (on_line, [])
+        try:
+            yield
+        finally:
+            _, pending = self._local.handler
+            self._local.handler = None
+            # Trailing output without a newline, e.g. a failed "Connecting...."
+            if pending:
+                on_line(''.join(pending))
+
+    def write(self, s: str) -> int:
+        handler = getattr(self._local, 'handler', None)
+        if handler is None:
+            return self.stream.write(s)
+
+        on_line, pending = handler
+        *lines, rest = s.split('\n')
+        for line in lines:
+            pending.append(line)
+            text = ''.join(pending)
+            pending.clear()
+            on_line(text)
+        if rest:
+            pending.append(rest)
+        return len(s)
+
+    def flush(self) -> None:
+        if getattr(self._local, 'handler', None) is None:
+            self.stream.flush()
+
+    def isatty(self) -> bool:
+        # Captured output is logged line by line, never redrawn in place
+        if getattr(self._local, 'handler', None) is None:
+            return self.stream.isatty()
+        return False
+
+    def writable(self) -> bool:
+        return True
+
+    def fileno(self) -> int:
+        return self.stream.fileno()
+
+    @property
+    def encoding(self) -> Optional[str]:
+        return getattr(self.stream, 'encoding', None)
+
+
+_output_lock = threading.Lock()
+
+
+def _thread_output() -> _ThreadOutput:
+    """Install the per-thread stdout router on first use and return it."""
+    with _output_lock:
+        if not isinstance(sys.stdout, _ThreadOutput):
+            sys.stdout = _ThreadOutput(sys.stdout)
+        return sys.stdout
+
+
+class FirmwareBlob:
+    """Firmware file read once per revision and shared by concurrent flashes."""
+
+    __slots__ = ('path', 'data', '_stamp')
+
+    def __init__(self, path: str):
+        firmware = Path(path)
+        st = firmware.stat()
+        if st.st_size == 0:
+            raise ValueError(f"Firmware file is empty: {path}")
+
+        self.path = str(firmware.resolve())
+        self.data = firmware.read_bytes()
+        self._stamp = (st.st_mtime_ns, st.st_size)
+
+    def open(self) -> io.BytesIO:
+        """Get a private read handle on the image, named for esptool's messages."""
+        # BytesIO shares the bytes object until written to, so this doesn't copy
+        f = io.BytesIO(self.data)
+        f.name = self.path
+        return f
+
+    def is_current(self) -> bool:
+        """Check whether the file on disk is still the revision that was read."""
+        try:
+            st = Path(self.path).stat()
+        except OSError:
+            return False
+        return (st.st_mtime_ns, st.st_size) == self._stamp
+
+
 class ESP32Flasher:
     """Handles ESP32 flashing operations using esptool."""
 
@@ -27,49 +148,89 @@ class ESP32Flasher:
         self.chip = chip
         self.baud_rate = baud_rate
         self.verify = verify
+        # Image of the firmware being flashed, shared by concurrent flashes;
+        # selecting another file replaces it rather than piling up old ones
+        self._image: Optional[FirmwareBlob] = None
+        self._image_lock = threading.Lock()
 
-    def get_chip_info(self, port: str) -> Tuple[Optional[str], Optional[str]]:
-        """Get chip type and MAC address from device.
+    def load_firmware(self, firmware_path: str) -> FirmwareBlob:
+        """Get the image for a firmware file, reading it once per revision.
+
+        Args:
+            firmware_path: Path to firmware binary
 
         Returns:
-            Tuple of (chip_type, mac_address)
+            FirmwareBlob for the file's current contents
         """
+        path = str(Path(firmware_path).resolve())
+
+        with self._image_lock:
+            blob = self._image
+            if blob is None or blob.path != path or not blob.is_current():
+                blob = self._image = FirmwareBlob(path)
+            return blob
+
+    def _connect(self, port: str, stub: bool = False):
+        """Open an esptool loader on a port, optionally running the flasher stub.
+
+        Returns:
+            Connected esptool ESPLoader instance
+        """
+        # Sync at the ROM baud rate, then switch up like the esptool CLI does
+        rom_baud = min(esptool.ESPLoader.ESP_ROM_BAUD, self.baud_rate)
+        esp = esptool.detect_chip(port, rom_baud)
+
         try:
-            cmd = [
-                "esptool.py",
-                "--port", port,
-                "--baud", str(self.baud_rate),
-                "chip_id"
-            ]
+            # As in the CLI, the stub can't run in Secure Download Mode or on
+            # chips that have it disabled; the ROM loader is used instead
+            if stub and not esp.secure_download_mode and not getattr(esp, 'stub_is_disabled', False):
+                esp = esp.run_stub()
+            if self.baud_rate > rom_baud:
+                esp.change_baud(self.baud_rate)
+        except Exception:
+            esp._port.close()
+            raise
 
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+        return esp
 
-            output = result.stdout + result.stderr
+    @staticmethod
+    def _describe(esp) -> Tuple[str, Optional[str]]:
+        """Read chip type and MAC address from a connected loader."""
+        # eFuses (chip revision, MAC) can't be read in Secure Download Mode
+        if esp.secure_download_mode:
+            return esp.CHIP_NAME, None
 
-            # Extract chip type
-            chip_match = re.search(r'Chip is (ESP[^\s]+)', output)
-            chip_type = chip_match.group(1) if chip_match else None
+        # Description is e.g. "ESP32-D0WD-V3 (revision v3.0)"; keep the part name
+        chip_type = esp.get_chip_description().split()[0]
+        mac = ':'.join(f'{b:02x}' for b in esp.read_mac())
+        return chip_type, mac
 
-            # Extract MAC address
-            mac_match = re.search(r'MAC: ([0-9a-f:]+)', output, re.IGNORECASE)
-            mac = mac_match.group(1) if mac_match else None
+    def get_chip_info(self, port: str) -> Tuple[Optional[str], Optional[str]]:
+        """Get chip type and MAC address from device.
 
-            return chip_type, mac
+        Returns:
+            Tuple of (chip_type, mac_address)
+        """
+        try:
+            esp = self._connect(port)
+        except Exception:
+            return None, None
 
-        except Exception as e:
+        try:
+            return self._describe(esp)
+        except Exception:
             return None, None
+        finally:
+            esp._port.close()
 
     def flash_firmware(
         self,
         port: str,
         firmware_path: str,
         offset: int = 0x1000,
-        progress_callback: Optional[Callable[[int], None]] = None
+        progress_callback: Optional[Callable[[int], None]] = None,
+        log_sink: Optional[TextIO] = None,
+        progress_stride_pct: int = 1
     ) -> FlashResult:
         """Flash firmware to ESP32 device.
 
@@ -77,7 +238,13 @@ class ESP32Flasher:
             port: Serial port device path
             firmware_path: Path to firmware binary
             offset: Flash offset address
-            progress_callback: Optional callback for progress updates (0-100)
+            progress_callback: Optional callback for progress updates (0-100);
+                it may raise FlashCancelled to stop before the erase or
+                between blocks
+            log_sink: Optional text stream that receives each log line as it
+                is produced; only the last LOG_TAIL_LINES stay in memory
+            progress_stride_pct: Minimum percentage change between progress
+                callbacks; 100% is always reported
 
         Returns:
             FlashResult with operation details
@@ -86,69 +253,109 @@ class ESP32Flasher:
         result = FlashResult(success=False, port=port)
 
         # Validate firmware file
-        firmware = Path(firmware_path)
-        if not firmware.exists():
+        if not Path(firmware_path).exists():
             result.error_msg = f"Firmware file not found: {firmware_path}"
             return result
 
+        log_lines = deque(maxlen=LOG_TAIL_LINES)
+        last_pct = 0
+
+        def log(line: str) -> None:
+            log_lines.append(line)
+            if log_sink:
+                log_sink.write(f"{line}\n")
+
+        def on_output(line: str) -> None:
+            # esptool's transcript; its write progress lines drive the callback
+            nonlocal last_pct
+            log(line)
+            match = _PROGRESS_RE.search(line) if progress_callback else None
+            if match:
+                pct = int(match.group(1))
+                if pct - last_pct >= progress_stride_pct or pct == 100:
+                    last_pct = pct
+                    progress_callback(pct)
+
+        esp = None
         try:
-            # Get chip info first
-            chip_type, mac = self.get_chip_info(port)
-            result.chip_type = chip_type
-            result.mac = mac
-
-            # Build esptool command
-            cmd = [
-                "esptool.py",
-                "--chip", self.chip,
-                "--port", port,
-                "--baud", str(self.baud_rate),
-                "write_flash"
-            ]
-
-            if self.verify:
-                cmd.append("--verify")
-
-            cmd.extend(["-z", hex(offset), str(firmware)])
-
-            # Execute flash operation
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1
-            )
-
-            output_lines = []
-            for line in process.stdout:
-                output_lines.append(line)
-
-                # Parse progress from esptool output
+            with _thread_output().capture(on_output):
+                # Chip info comes from the flashing connection; no separate probe
+                esp = self._connect(port, stub=True)
+                result.chip_type, result.mac = self._describe(esp)
+                log(f"Chip is {result.chip_type}")
+                if result.mac:
+                    log(f"MAC: {result.mac}")
+
+                if self.chip != 'auto' and esp.CHIP_NAME.replace('-', '').lower() != self.chip.lower():
+                    raise esptool.FatalError(
+                        f"Wrong chip: expected {self.chip}, found {esp.CHIP_NAME}"
+                    )
+
+                self._set_flash_size(esp)
+
+                # Last chance to cancel before write_flash erases the region
                 if progress_callback:
-                    # esptool outputs: Writing at 0x00001000... (X %)
-                    progress_match = re.search(r'\((\d+)\s*%\)', line)
-                    if progress_match:
-                        progress = int(progress_match.group(1))
-                        progress_callback(progress)
+                    progress_callback(0)
 
-            process.wait()
-            result.log_output = ''.join(output_lines)
+                # esptool's own write_flash, so its secure boot, image chip and
+                # revision, flash encryption and fits-in-flash guards all run
+                # before anything is erased, and the MD5 check after writing
+                with self.load_firmware(firmware_path).open() as image:
+                    esptool.cmds.write_flash(esp, self._write_flash_args(esp, offset, image))
 
-            # Check result
-            if process.returncode == 0:
+                # Leave flash mode and reboot into the new firmware
+                esp.hard_reset()
+                log("Hard resetting via RTS pin...")
                 result.success = True
-            else:
-                result.error_msg = f"esptool failed with code {process.returncode}"
 
-        except subprocess.TimeoutExpired:
-            result.error_msg = "Flash operation timed out"
+        except FlashCancelled:
+            # The port is closed below, so the device can be flashed again as is
+            result.error_msg = "cancelled"
+            log("Flash cancelled")
         except Exception as e:
             result.error_msg = f"Flash error: {str(e)}"
-
+            log(f"A fatal error occurred: {e}")
+            # Underlying causes, e.g. the serial error behind a failed connect
+            cause = e.__cause__ or e.__context__
+            while cause is not None:
+                log(f"Caused by {type(cause).__name__}: {cause}")
+                cause = cause.__cause__ or cause.__context__
+        finally:
+            if esp is not None:
+                esp._port.close()
+
+        result.log_output = ''.join(f"{line}\n" for line in log_lines)
         result.duration = time.time() - start_time
         return result
 
+    def _write_flash_args(self, esp, offset: int, image: io.BytesIO) -> argparse.Namespace:
+        """Arguments for esptool.cmds.write_flash, as the CLI parses "write_flash -z"."""
+        return argparse.Namespace(
+            chip=esp.CHIP_NAME.lower().replace('-', ''),
+            addr_filename=[(offset, image)],
+            compress=True,
+            no_compress=False,
+            no_stub=not esp.IS_STUB,
+            force=False,  # never skip esptool's safety checks
+            encrypt=False,
+            encrypt_files=None,
+            ignore_flash_encryption_efuse_setting=False,
+            erase_all=False,
+            flash_mode='keep',
+            flash_freq='keep',
+            flash_size='keep',
+            # The MD5 check always runs; verify adds esptool's read-back pass
+            verify=self.verify,
+        )
+
+    @staticmethod
+    def _set_flash_size(esp) -> None:
+        """Detect the attached SPI flash size and configure the loader for it."""
+        # None in Secure Download Mode, where the flash ID can't be read
+        flash_size = esptool.cmds.detect_flash_size(esp)
+        if flash_size is not None:
+            esp.flash_set_parameters(esptool.util.flash_size_bytes(flash_size))
+
     def erase_flash(self, port: str) -> bool:
         """Erase entire flash memory.
 
@@ -159,19 +366,18 @@ class ESP32Flasher:
             True if erase successful
         """
         try:
-            cmd = [
-                "esptool.py",
-                "--chip", self.chip,
-                "--port", port,
-                "--baud", str(self.baud_rate),
-                "erase_flash"
-            ]
-
-            result = subprocess.run(cmd, capture_output=True, timeout=30)
-            return result.returncode == 0
+            esp = self._connect(port, stub=True)
+        except Exception:
+            return False
 
+        try:
+            esp.erase_flash()
+            esp.hard_reset()
+            return True
         except Exception:
             return False
+        finally:
+            esp._port.close()
 
     def verify_port(self, port: str) -> bool:
         """Verify that a port has an ESP32 device connected.
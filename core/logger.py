@@ -1,9 +1,9 @@
 """Logging utilities for parallel ESP32 flasher."""
 import logging
 import sys
+import time
 from pathlib import Path
-from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 
 class FlashLogger:
@@ -14,6 +14,29 @@ class FlashLogger:
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.console = console
         self._loggers = {}
+        self._port_names: Dict[str, str] = {}
+        self._today = ''
+        self._day_rollover = 0.0
+
+    def _current_date(self) -> str:
+        """Get today's date string, recomputed only after local midnight."""
+        now = time.time()
+        if now >= self._day_rollover:
+            t = time.localtime(now)
+            self._today = time.strftime('%Y-%m-%d', t)
+            # mktime normalizes day + 1 across month and year ends
+            self._day_rollover = time.mktime(
+                (t.tm_year, t.tm_mon, t.tm_mday + 1, 0, 0, 0, 0, 0, -1)
+            )
+        return self._today
+
+    def _port_name(self, port: str) -> str:
+        """Get a filesystem-safe name for a port."""
+        name = self._port_names.get(port)
+        if name is None:
+            name = port.replace('/', '_')
+            self._port_names[port] = name
+        return name
 
     def get_logger(self, name: str = "zflash") -> logging.Logger:
         """Get or create a logger instance."""
@@ -28,7 +51,7 @@ class FlashLogger:
             return logger
 
         # File handler - daily log file
-        log_file = self.log_dir / f"{datetime.now().strftime('%Y-%m-%d')}.log"
+        log_file = self.log_dir / f"{self._current_date()}.log"
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(logging.DEBUG)
         file_formatter = logging.Formatter(
@@ -52,13 +75,11 @@ class FlashLogger:
 
     def get_port_logger(self, port: str) -> logging.Logger:
         """Get a logger for a specific port."""
-        port_name = port.replace('/', '_')
-        logger_name = f"zflash.{port_name}"
+        logger_name = f"zflash.{self._port_name(port)}"
         return self.get_logger(logger_name)
 
     def create_session_log(self, port: str) -> Path:
         """Create a session-specific log file for detailed output."""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        port_name = port.replace('/', '_')
-        log_file = self.log_dir / f"{port_name}_{timestamp}.log"
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
+        log_file = self.log_dir / f"{self._port_name(port)}_{timestamp}.log"
         return log_file
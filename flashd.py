@@ -6,11 +6,14 @@ This daemon manages concurrent ESP32 flashing operations.
 Can run in headless mode or launch GUI.
 """
 import argparse
+import math
 import sys
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 from core import (
     Config,
@@ -22,6 +25,13 @@ from core import (
 )
 
 
+# Completed flash records buffered before a batched database insert
+RECORD_BATCH_SIZE = 8
+
+# Seconds a single device may flash, counted from when its flash starts
+FLASH_TIMEOUT = 300
+
+
 class FlashDaemon:
     """Main daemon managing flash operations."""
 
@@ -38,6 +48,12 @@ class FlashDaemon:
         )
         self.executor = ThreadPoolExecutor(max_workers=self.config.max_workers)
         self.active_flashes: Dict[str, asyncio.Task] = {}
+        # (chip_type, mac) per port, dropped when the device is unplugged
+        self.chip_cache: Dict[str, Tuple[str, str]] = {}
+        self._stop_event = threading.Event()
+        # History records from batch flashes, written in groups of RECORD_BATCH_SIZE
+        self._pending_records: List[Dict] = []
+        self._records_lock = threading.Lock()
 
     def flash_device(self, port: str, firmware_path: Optional[str] = None) -> FlashResult:
         """Flash a single device.
@@ -49,6 +65,16 @@ class FlashDaemon:
         Returns:
             FlashResult object
         """
+        result, record = self._flash(port, firmware_path)
+        self.db.add_record(**record)
+        return result
+
+    def _flash(self, port: str, firmware_path: Optional[str] = None) -> Tuple[FlashResult, Dict]:
+        """Flash a device and build its history record without storing it.
+
+        Returns:
+            Tuple of (FlashResult, record dict for FlashDatabase.add_record)
+        """
         fw_path = firmware_path or self.config.firmware_path
         port_log = self.logger.get_port_logger(port)
 
@@ -58,37 +84,59 @@ class FlashDaemon:
         # Create session log
         session_log = self.logger.create_session_log(port)
 
-        # Execute flash
-        result = self.flasher.flash_firmware(
-            port=port,
-            firmware_path=fw_path,
-            offset=self.config.flash_offset,
-            progress_callback=lambda p: port_log.debug(f"Progress: {p}%")
-        )
-
-        # Save session log
+        # Execute flash, streaming output straight into the session log
         with open(session_log, 'w') as f:
-            f.write(result.log_output)
-
-        # Log to database
-        self.db.add_record(
-            port=port,
-            status='success' if result.success else 'fail',
-            mac=result.mac,
-            chip_type=result.chip_type,
-            duration=result.duration,
-            firmware=fw_path,
-            log_path=str(session_log),
-            error_msg=result.error_msg
-        )
+            result = self.flasher.flash_firmware(
+                port=port,
+                firmware_path=fw_path,
+                offset=self.config.flash_offset,
+                progress_callback=lambda p: port_log.debug(f"Progress: {p}%"),
+                log_sink=f
+            )
+
+        # Database record, stored by the caller
+        record = {
+            'port': port,
+            'status': 'success' if result.success else 'fail',
+            'mac': result.mac,
+            'chip_type': result.chip_type,
+            'duration': result.duration,
+            'firmware': fw_path,
+            'log_path': str(session_log),
+            'error_msg': result.error_msg
+        }
 
         if result.success:
             port_log.info(f"✓ Flash successful - MAC: {result.mac} - {result.duration:.2f}s")
         else:
             port_log.error(f"✗ Flash failed - {result.error_msg}")
 
+        return result, record
+
+    def _flash_buffered(self, port: str, firmware_path: Optional[str] = None) -> FlashResult:
+        """Flash a device and queue its history record for a batched insert.
+
+        The worker hands over its own record, so it is stored even if
+        nobody is waiting for the result any more.
+        """
+        result, record = self._flash(port, firmware_path)
+
+        with self._records_lock:
+            self._pending_records.append(record)
+            if len(self._pending_records) < RECORD_BATCH_SIZE:
+                return result
+            batch, self._pending_records = self._pending_records, []
+
+        self.db.add_records(batch)
         return result
 
+    def _flush_records(self) -> None:
+        """Store any buffered history records."""
+        with self._records_lock:
+            batch, self._pending_records = self._pending_records, []
+        if batch:
+            self.db.add_records(batch)
+
     def flash_all_devices(self, firmware_path: Optional[str] = None) -> Dict[str, FlashResult]:
         """Flash all connected devices in parallel.
 
@@ -106,25 +154,60 @@ class FlashDaemon:
 
         self.log.info(f"Found {len(devices)} device(s): {devices}")
 
+        # Start times per port; time spent queued behind max_workers doesn't count
+        started: Dict[str, float] = {}
+
+        def run(port: str) -> FlashResult:
+            started[port] = time.monotonic()
+            return self._flash_buffered(port, firmware_path)
+
         # Submit all flash tasks
-        futures = {
-            port: self.executor.submit(self.flash_device, port, firmware_path)
-            for port in devices
-        }
+        future_to_port = {self.executor.submit(run, port): port for port in devices}
 
-        # Collect results
+        # Bound the whole batch too: one budget per wave of max_workers flashes,
+        # so queued devices can't keep the loop alive if running flashes hang
+        waves = math.ceil(len(devices) / self.config.max_workers)
+        deadline = time.monotonic() + FLASH_TIMEOUT * waves
+
+        # Collect results as they finish; workers buffer their own records
         results = {}
-        for port, future in futures.items():
-            try:
-                results[port] = future.result(timeout=300)  # 5 min timeout per device
-            except Exception as e:
-                self.log.error(f"Flash failed for {port}: {e}")
+        pending = set(future_to_port)
+        while pending:
+            # Wake at least once a second to check running flashes against their budget
+            done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                port = future_to_port[future]
+                try:
+                    results[port] = future.result()
+                except Exception as e:
+                    self.log.error(f"Flash failed for {port}: {e}")
+                    results[port] = FlashResult(
+                        success=False,
+                        port=port,
+                        error_msg=str(e)
+                    )
+
+            now = time.monotonic()
+            for future in list(pending):
+                port = future_to_port[future]
+                start = started.get(port)
+                if now > deadline:
+                    # Devices that never got a worker aren't flashed unattended
+                    future.cancel()
+                elif start is None or now - start <= FLASH_TIMEOUT:
+                    continue
+
+                # Stop waiting; a running worker still stores its record when it ends
+                pending.discard(future)
+                self.log.error(f"Flash timed out for {port}")
                 results[port] = FlashResult(
                     success=False,
                     port=port,
-                    error_msg=str(e)
+                    error_msg="Flash operation timed out"
                 )
 
+        self._flush_records()
         return results
 
     def monitor_mode(self) -> None:
@@ -145,11 +228,13 @@ class FlashDaemon:
         self.device_manager.start_monitoring()
 
         try:
-            # Keep running
-            while True:
-                asyncio.sleep(1)
+            # Block until stopped; the timeout keeps Ctrl+C responsive
+            while not self._stop_event.wait(1.0):
+                pass
         except KeyboardInterrupt:
             self.log.info("\nStopping monitor mode")
+            self._stop_event.set()
+        finally:
             self.device_manager.stop_monitoring()
 
     def show_statistics(self) -> None:
@@ -176,7 +261,10 @@ class FlashDaemon:
 
     def cleanup(self) -> None:
         """Cleanup resources."""
+        self._stop_event.set()
         self.executor.shutdown(wait=True)
+        # Records of flashes that outlived their flash_all_devices call
+        self._flush_records()
         self.db.close()
 
 
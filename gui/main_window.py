@@ -1,63 +1,146 @@
 """Main GUI window for parallel ESP32 flasher."""
+import bisect
+import re
 import sys
-from typing import Dict, Optional
+import threading
+from collections import deque
+from typing import Dict, FrozenSet, List, Optional, Tuple
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QGridLayout, QPushButton, QTextEdit, QLabel, QFileDialog,
-    QMessageBox, QToolBar
+    QGridLayout, QPushButton, QPlainTextEdit, QLabel, QFileDialog,
+    QMessageBox, QStyle, QToolBar
+)
+from PyQt6.QtCore import (
+    Qt, QTimer, pyqtSignal, pyqtSlot, QObject, QRunnable, QThread, QThreadPool
 )
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QThread
 from PyQt6.QtGui import QAction, QFont
 
 from gui.widgets import PortWidget
-from core import FlashResult
+from core import FlashCancelled, FlashResult
+
+
+# Hidden PortWidgets built at startup so hotplug doesn't construct widgets
+PORT_WIDGET_POOL_SIZE = 8
+
+_DIGITS = re.compile(r'(\d+)')
+
+
+def _natural_key(port: str) -> tuple:
+    """Sort key that orders ports numerically, e.g. ttyUSB2 before ttyUSB10."""
+    return tuple(int(part) if part.isdigit() else part for part in _DIGITS.split(port))
 
 
-class FlashWorker(QThread):
-    """Worker thread for flashing operation."""
+class FlashSignals(QObject):
+    """Signals emitted by a FlashTask (QRunnable cannot emit signals itself)."""
 
     finished = pyqtSignal(str, FlashResult)
     progress = pyqtSignal(str, int)
     chip_info = pyqtSignal(str, str, str)  # port, chip_type, mac
 
+
+class FlashTask(QRunnable):
+    """Flash operation run on the shared thread pool."""
+
     def __init__(self, daemon, port: str, firmware_path: Optional[str] = None):
         super().__init__()
+        # MainWindow keeps a reference until finished; don't let Qt delete it
+        self.setAutoDelete(False)
         self.daemon = daemon
         self.port = port
         self.firmware_path = firmware_path
+        self.signals = FlashSignals()
+        self.cancel_flag = threading.Event()
 
     def run(self):
         """Execute flash operation."""
-        # Get chip info first
-        chip_type, mac = self.daemon.flasher.get_chip_info(self.port)
-        if chip_type or mac:
-            self.chip_info.emit(self.port, chip_type or "Unknown", mac or "Unknown")
+        # Show what this port reported last time; the flash itself reads it fresh
+        cached = self.daemon.chip_cache.get(self.port)
+        if cached:
+            self.signals.chip_info.emit(self.port, *cached)
+
+        # Cancelled while queued: don't even open the port
+        if self.cancel_flag.is_set():
+            self.signals.finished.emit(
+                self.port, FlashResult(success=False, port=self.port, error_msg="cancelled")
+            )
+            return
 
-        # Flash with progress callback
+        # Flash with progress callback; also the cooperative cancellation point
         def progress_cb(value):
-            self.progress.emit(self.port, value)
+            if self.cancel_flag.is_set():
+                raise FlashCancelled()
+            self.signals.progress.emit(self.port, value)
 
         result = self.daemon.flasher.flash_firmware(
             port=self.port,
             firmware_path=self.firmware_path or self.daemon.config.firmware_path,
             offset=self.daemon.config.flash_offset,
-            progress_callback=progress_cb
+            progress_callback=progress_cb,
+            progress_stride_pct=1  # the flasher only calls back on whole-percent steps
         )
 
-        self.finished.emit(self.port, result)
+        if result.chip_type or result.mac:
+            self.signals.chip_info.emit(
+                self.port, result.chip_type or "Unknown", result.mac or "Unknown"
+            )
+
+        self.signals.finished.emit(self.port, result)
+
+
+class PortWorker(QObject):
+    """Runs FlashTasks for one port on a dedicated, persistent thread."""
+
+    submit = pyqtSignal(object)  # FlashTask
+
+    def __init__(self):
+        super().__init__()
+        # Queued once moved to its thread, so tasks run there
+        self.submit.connect(self._execute)
+
+    @pyqtSlot(object)
+    def _execute(self, task: FlashTask):
+        task.run()
 
 
 class MainWindow(QMainWindow):
     """Main application window."""
 
+    # Hotplug callbacks fire on the monitor thread; these hop them to the GUI thread
+    device_added = pyqtSignal(str)
+    device_removed = pyqtSignal(str)
+
     def __init__(self, daemon):
         super().__init__()
         self.daemon = daemon
+        self.device_manager = daemon.device_manager
         self.port_widgets: Dict[str, PortWidget] = {}
-        self.flash_workers: Dict[str, FlashWorker] = {}
+        self._last_ports: FrozenSet[str] = frozenset()
+        self._grid_pos: Dict[str, Tuple[int, int]] = {}
+        # (natural key, port) for each widget, kept in grid order
+        self._sorted_keys: List[Tuple[tuple, str]] = []
+        self.flash_tasks: Dict[str, FlashTask] = {}
         self.current_firmware = daemon.config.firmware_path
 
+        # Reused flash threads; the bound also protects weak USB hubs
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(daemon.config.max_workers)
+        # Per-port threads, used instead of the pool when thread affinity is enabled
+        self._port_threads: Dict[str, Tuple[QThread, PortWorker]] = {}
+
+        # Refresh requests within the debounce window collapse into one scan
+        self._refresh_pending = False
+        self._refresh_debounce = QTimer(self)
+        self._refresh_debounce.setSingleShot(True)
+        self._refresh_debounce.setInterval(250)
+        self._refresh_debounce.timeout.connect(self._do_refresh)
+
         self._init_ui()
+
+        # Free list of hidden widgets; removed ports return theirs here
+        self._port_pool: List[PortWidget] = [
+            self._new_port_widget() for _ in range(PORT_WIDGET_POOL_SIZE)
+        ]
+
         self._setup_device_monitoring()
 
     def _init_ui(self):
@@ -104,11 +187,20 @@ class MainWindow(QMainWindow):
         console_label.setFont(font)
         console_layout.addWidget(console_label)
 
-        self.console = QTextEdit()
+        # Plain text with a block cap acts as a ring buffer of recent lines
+        self.console = QPlainTextEdit()
         self.console.setReadOnly(True)
+        self.console.setMaximumBlockCount(2000)
         self.console.setMaximumWidth(350)
         console_layout.addWidget(self.console)
 
+        # Messages are buffered and appended in one batch per flush
+        self._log_buf = deque()
+        self._log_timer = QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(50)
+        self._log_timer.timeout.connect(self._flush_log)
+
         # Clear console button
         clear_btn = QPushButton("Clear Log")
         clear_btn.clicked.connect(self.console.clear)
@@ -126,54 +218,61 @@ class MainWindow(QMainWindow):
         """Create application toolbar."""
         toolbar = QToolBar()
         toolbar.setMovable(False)
+        # Keep the labels next to the icons; the default shows icons only
+        toolbar.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextBesideIcon)
         self.addToolBar(toolbar)
 
+        # Stock style icons instead of emoji, which need font fallback and shaping
+        icon = self.style().standardIcon
+
         # Refresh devices
-        refresh_action = QAction("🔄 Refresh Devices", self)
+        refresh_action = QAction(icon(QStyle.StandardPixmap.SP_BrowserReload), "Refresh Devices", self)
         refresh_action.triggered.connect(self.refresh_devices)
         toolbar.addAction(refresh_action)
 
         toolbar.addSeparator()
 
         # Flash all
-        flash_all_action = QAction("⚡ Flash All", self)
+        flash_all_action = QAction(icon(QStyle.StandardPixmap.SP_MediaPlay), "Flash All", self)
         flash_all_action.triggered.connect(self.flash_all)
         toolbar.addAction(flash_all_action)
 
         # Stop all
-        stop_action = QAction("🛑 Stop All", self)
+        stop_action = QAction(icon(QStyle.StandardPixmap.SP_MediaStop), "Stop All", self)
         stop_action.triggered.connect(self.stop_all)
         toolbar.addAction(stop_action)
 
         toolbar.addSeparator()
 
         # Select firmware
-        firmware_action = QAction("📁 Select Firmware", self)
+        firmware_action = QAction(icon(QStyle.StandardPixmap.SP_DirOpenIcon), "Select Firmware", self)
         firmware_action.triggered.connect(self.select_firmware)
         toolbar.addAction(firmware_action)
 
         toolbar.addSeparator()
 
         # Reset stats
-        reset_action = QAction("🔢 Reset Stats", self)
+        reset_action = QAction(icon(QStyle.StandardPixmap.SP_DialogResetButton), "Reset Stats", self)
         reset_action.triggered.connect(self.reset_stats)
         toolbar.addAction(reset_action)
 
     def _setup_device_monitoring(self):
         """Setup automatic device monitoring."""
-        self.device_manager = self.daemon.device_manager
-
         # Register callbacks
-        self.device_manager.register_callback('add', self._on_device_added)
-        self.device_manager.register_callback('remove', self._on_device_removed)
+        self.device_added.connect(self._on_device_added)
+        self.device_removed.connect(self._on_device_removed)
+        self.device_manager.register_callback('add', self.device_added.emit)
+        self.device_manager.register_callback('remove', self.device_removed.emit)
 
         # Start monitoring
         self.device_manager.start_monitoring()
 
-        # Periodic refresh timer
-        self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_devices)
-        self.refresh_timer.start(5000)  # Refresh every 5 seconds
+        # Periodic refresh timer, only needed without event-driven hotplug
+        self.refresh_timer: Optional[QTimer] = None
+        if not self.device_manager.has_hotplug:
+            self.refresh_timer = QTimer(self)
+            self.refresh_timer.timeout.connect(self.refresh_devices)
+            self.refresh_timer.start(5000)  # Refresh every 5 seconds
 
     def _on_device_added(self, port: str):
         """Handle device added event."""
@@ -183,51 +282,88 @@ class MainWindow(QMainWindow):
     def _on_device_removed(self, port: str):
         """Handle device removed event."""
         self.log(f"Device disconnected: {port}")
+        self.daemon.chip_cache.pop(port, None)
         self.refresh_devices()
 
     def refresh_devices(self):
-        """Refresh device list and update grid."""
-        devices = self.device_manager.scan_devices()
+        """Schedule a device refresh, coalescing bursts of requests."""
+        self._refresh_pending = True
+        self._refresh_debounce.start()  # restarting resets the interval
 
-        # Remove widgets for disconnected devices
-        for port in list(self.port_widgets.keys()):
-            if port not in devices:
-                widget = self.port_widgets.pop(port)
-                self.grid_layout.removeWidget(widget)
-                widget.deleteLater()
+    def _do_refresh(self):
+        """Refresh device list and update grid."""
+        if not self._refresh_pending:
+            return
+        self._refresh_pending = False
 
-        # Add widgets for new devices
-        for port in devices:
-            if port not in self.port_widgets:
-                self._add_port_widget(port)
+        ports = frozenset(self.device_manager.scan_devices())
 
-        self._reorganize_grid()
+        # Nothing plugged or unplugged: leave the grid (and widget state) alone
+        if ports == self._last_ports:
+            return
 
-    def _add_port_widget(self, port: str):
-        """Add a port widget to the grid."""
-        widget = PortWidget(port)
+        # Hold repaints until the grid is final; re-enabling schedules one update
+        self.grid_widget.setUpdatesEnabled(False)
+        try:
+            # Drop disconnected ports and slot new ones into the natural ordering;
+            # widgets are created and placed in a single pass over that ordering
+            for port in self._last_ports - ports:
+                self._destroy(port)
+            for port in ports - self._last_ports:
+                bisect.insort(self._sorted_keys, (_natural_key(port), port))
+
+            self._last_ports = ports
+            self._reorganize_grid()
+        finally:
+            self.grid_widget.setUpdatesEnabled(True)
+
+    def _new_port_widget(self) -> PortWidget:
+        """Construct a hidden, unbound port widget."""
+        widget = PortWidget("", self.grid_widget)
         widget.clicked.connect(self.on_port_clicked)
+        widget.hide()
+        return widget
+
+    def _make_widget(self, port: str) -> PortWidget:
+        """Take a widget from the pool (or build one) for a newly connected port."""
+        widget = self._port_pool.pop() if self._port_pool else self._new_port_widget()
+        widget.rebind(port)
+        widget.show()
         self.port_widgets[port] = widget
+        return widget
+
+    def _place(self, port: str, widget: PortWidget, row: int, col: int):
+        """Put a widget in a grid cell, skipping it if it is already there."""
+        cell = (row, col)
+        current = self._grid_pos.get(port)
+        if current == cell:
+            return
+        if current is not None:
+            self.grid_layout.removeWidget(widget)
+        self.grid_layout.addWidget(widget, row, col)
+        self._grid_pos[port] = cell
+
+    def _destroy(self, port: str):
+        """Remove a disconnected port's widget from the grid and pool it."""
+        self._sorted_keys.remove((_natural_key(port), port))
+        self._grid_pos.pop(port, None)
+        widget = self.port_widgets.pop(port, None)
+        if widget:
+            self.grid_layout.removeWidget(widget)
+            widget.hide()
+            self._port_pool.append(widget)
+        # A flash still running on the port releases its thread when it finishes
+        if port not in self.flash_tasks:
+            self._release_port_thread(port)
 
     def _reorganize_grid(self):
         """Reorganize grid layout based on number of devices."""
-        # Clear grid
-        for i in reversed(range(self.grid_layout.count())):
-            self.grid_layout.itemAt(i).widget().setParent(None)
-
         # Calculate grid dimensions (prefer 3-4 columns)
-        num_devices = len(self.port_widgets)
-        if num_devices == 0:
-            return
-
-        cols = min(4, num_devices)
-        rows = (num_devices + cols - 1) // cols
+        cols = min(4, len(self._sorted_keys)) or 1
 
-        # Add widgets to grid
-        for idx, (port, widget) in enumerate(sorted(self.port_widgets.items())):
-            row = idx // cols
-            col = idx % cols
-            self.grid_layout.addWidget(widget, row, col)
+        for idx, (_, port) in enumerate(self._sorted_keys):
+            widget = self.port_widgets.get(port) or self._make_widget(port)
+            self._place(port, widget, idx // cols, idx % cols)
 
     def on_port_clicked(self, port: str):
         """Handle port widget click - flash single device."""
@@ -235,7 +371,7 @@ class MainWindow(QMainWindow):
 
     def flash_device(self, port: str):
         """Flash a single device."""
-        if port in self.flash_workers and self.flash_workers[port].isRunning():
+        if port in self.flash_tasks:
             self.log(f"Flash already in progress for {port}")
             return
 
@@ -247,14 +383,39 @@ class MainWindow(QMainWindow):
         widget.set_progress(0)
         self.log(f"Starting flash: {port}")
 
-        # Create worker thread
-        worker = FlashWorker(self.daemon, port, self.current_firmware)
-        worker.chip_info.connect(self._on_chip_info)
-        worker.progress.connect(self._on_progress)
-        worker.finished.connect(self._on_flash_finished)
-        worker.start()
-
-        self.flash_workers[port] = worker
+        # Queue on the shared thread pool
+        # The flasher loads the image once per revision and shares it between tasks
+        task = FlashTask(self.daemon, port, self.current_firmware)
+        task.signals.chip_info.connect(self._on_chip_info)
+        task.signals.progress.connect(self._on_progress)
+        task.signals.finished.connect(self._on_flash_finished)
+
+        self.flash_tasks[port] = task
+        if self.daemon.config.port_thread_affinity:
+            self._port_worker(port).submit.emit(task)
+        else:
+            self.pool.start(task)
+
+    def _port_worker(self, port: str) -> PortWorker:
+        """Get the worker bound to a port's thread, starting it on first use."""
+        entry = self._port_threads.get(port)
+        if entry is None:
+            thread = QThread(self)
+            worker = PortWorker()
+            worker.moveToThread(thread)
+            thread.start()
+            entry = self._port_threads[port] = (thread, worker)
+        return entry[1]
+
+    def _release_port_thread(self, port: str):
+        """Stop a disconnected port's thread; port names change across replugs."""
+        entry = self._port_threads.pop(port, None)
+        if entry is None:
+            return
+        thread, worker = entry
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        thread.quit()
 
     def flash_all(self):
         """Flash all connected devices."""
@@ -268,10 +429,10 @@ class MainWindow(QMainWindow):
 
     def stop_all(self):
         """Stop all flashing operations."""
-        for worker in self.flash_workers.values():
-            if worker.isRunning():
-                worker.terminate()
-                worker.wait()
+        # Cooperative cancel: tasks stop at their next progress callback,
+        # leaving the serial port in a usable state
+        for task in self.flash_tasks.values():
+            task.cancel_flag.set()
 
         for widget in self.port_widgets.values():
             if widget.status == 'flashing':
@@ -293,9 +454,17 @@ class MainWindow(QMainWindow):
 
     def _on_flash_finished(self, port: str, result: FlashResult):
         """Handle flash completion."""
+        task = self.flash_tasks.pop(port, None)
+        if port not in self.port_widgets:
+            self._release_port_thread(port)
+        if result.chip_type and result.mac:
+            self.daemon.chip_cache[port] = (result.chip_type, result.mac)
         widget = self.port_widgets.get(port)
         if widget:
-            if result.success:
+            if task and task.cancel_flag.is_set() and not result.success:
+                widget.set_status('idle', 'Stopped')
+                self.log(f"{port} - Stopped")
+            elif result.success:
                 widget.set_status('success')
                 widget.set_progress(100)
                 self.log(f"✓ {port} - Success ({result.duration:.2f}s)")
@@ -306,10 +475,6 @@ class MainWindow(QMainWindow):
         # Update statistics
         self._update_stats()
 
-        # Clean up worker
-        if port in self.flash_workers:
-            del self.flash_workers[port]
-
     def select_firmware(self):
         """Open file dialog to select firmware."""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -328,14 +493,20 @@ class MainWindow(QMainWindow):
 
     def reset_stats(self):
         """Reset flash statistics."""
-        reply = QMessageBox.question(
-            self,
-            "Reset Statistics",
-            "Are you sure you want to reset all statistics?",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-        )
-
-        if reply == QMessageBox.StandardButton.Yes:
+        # Window-modal via open() rather than exec(): no nested event loop, so
+        # flash signals keep being handled in order while the dialog is up
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Icon.Question)
+        box.setWindowTitle("Reset Statistics")
+        box.setText("Are you sure you want to reset all statistics?")
+        box.setStandardButtons(QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        box.buttonClicked.connect(lambda button: self._reset_stats_confirm(box, button))
+        box.open()
+
+    def _reset_stats_confirm(self, box: QMessageBox, button):
+        """Reset statistics once the confirmation dialog is accepted."""
+        if box.standardButton(button) == QMessageBox.StandardButton.Yes:
             self.daemon.db.reset_statistics()
             self._update_stats()
             self.log("Statistics reset")
@@ -351,12 +522,24 @@ class MainWindow(QMainWindow):
 
     def log(self, message: str):
         """Add message to console log."""
-        self.console.append(message)
+        self._log_buf.append(message)
+        if not self._log_timer.isActive():
+            self._log_timer.start()
+
+    def _flush_log(self):
+        """Append buffered log messages to the console."""
+        if self._log_buf:
+            self.console.appendPlainText("\n".join(self._log_buf))
+            self._log_buf.clear()
 
     def closeEvent(self, event):
         """Handle window close event."""
         self.device_manager.stop_monitoring()
         self.stop_all()
+        self.pool.waitForDone(5000)
+        for thread, _ in self._port_threads.values():
+            thread.quit()
+            thread.wait(5000)
         self.daemon.cleanup()
         event.accept()
 
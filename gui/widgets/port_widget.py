@@ -4,11 +4,32 @@ from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont
 
 
+# Background and border colors per status
+_STATUS_COLORS = {
+    'idle': ('#FFFFFF', '#CCCCCC'),      # White
+    'flashing': ('#FFF9C4', '#FBC02D'),  # Yellow
+    'success': ('#C8E6C9', '#388E3C'),   # Green
+    'fail': ('#FFCDD2', '#D32F2F')       # Red
+}
+
+
 class PortWidget(QWidget):
     """Widget displaying status for a single port."""
 
     clicked = pyqtSignal(str)  # Emits port name when clicked
 
+    # Stylesheet per status, formatted once
+    _STYLES = {
+        status: f"""
+            PortWidget {{
+                background-color: {bg_color};
+                border: 2px solid {border_color};
+                border-radius: 8px;
+            }}
+        """
+        for status, (bg_color, border_color) in _STATUS_COLORS.items()
+    }
+
     def __init__(self, port: str, parent=None):
         super().__init__(parent)
         self.port = port
@@ -70,6 +91,7 @@ class PortWidget(QWidget):
             status: One of 'idle', 'flashing', 'success', 'fail'
             message: Optional status message
         """
+        restyle = status != self.status
         self.status = status
 
         if message:
@@ -83,7 +105,8 @@ class PortWidget(QWidget):
             }
             self.status_label.setText(status_text.get(status, status))
 
-        self._update_style()
+        if restyle:
+            self._update_style()
 
     def set_chip_info(self, chip_type: str = None, mac: str = None):
         """Set chip information."""
@@ -94,6 +117,8 @@ class PortWidget(QWidget):
 
     def set_progress(self, value: int):
         """Set progress bar value (0-100)."""
+        if value == self.progress_bar.value():
+            return
         self.progress_bar.setValue(value)
 
     def reset(self):
@@ -105,32 +130,15 @@ class PortWidget(QWidget):
         self.status_label.setText("Idle")
         self._update_style()
 
+    def rebind(self, port: str):
+        """Reuse this widget for another port, starting from a clean state."""
+        self.port = port
+        self.port_label.setText(port)
+        self.reset()
+
     def _update_style(self):
         """Update widget styling based on status."""
-        colors = {
-            'idle': '#FFFFFF',      # White
-            'flashing': '#FFF9C4',  # Yellow
-            'success': '#C8E6C9',   # Green
-            'fail': '#FFCDD2'       # Red
-        }
-
-        border_colors = {
-            'idle': '#CCCCCC',
-            'flashing': '#FBC02D',
-            'success': '#388E3C',
-            'fail': '#D32F2F'
-        }
-
-        bg_color = colors.get(self.status, '#FFFFFF')
-        border_color = border_colors.get(self.status, '#CCCCCC')
-
-        self.setStyleSheet(f"""
-            PortWidget {{
-                background-color: {bg_color};
-                border: 2px solid {border_color};
-                border-radius: 8px;
-            }}
-        """)
+        self.setStyleSheet(self._STYLES.get(self.status, self._STYLES['idle']))
 
     def mousePressEvent(self, event):
         """Handle mouse click."""
@@ -2,7 +2,10 @@
 """Test setup - check for ESP32 devices and dependencies."""
 
 import sys
-import subprocess
+import io
+import contextlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 
 print("=" * 60)
 print("Parallel ESP32 Flash Station - Setup Test")
@@ -11,32 +14,27 @@ print("=" * 60)
 # Check Python version
 print(f"\n✓ Python version: {sys.version.split()[0]}")
 
-# Check for esptool
+# Check for esptool (imported once and reused for the device probes below)
 try:
-    result = subprocess.run(['esptool.py', 'version'],
-                          capture_output=True, text=True, timeout=5)
-    if result.returncode == 0:
-        version = result.stdout.strip().split('\n')[0]
-        print(f"✓ esptool.py: {version}")
-    else:
-        print("✗ esptool.py not found - run: pip install esptool")
-except FileNotFoundError:
+    import esptool
+    print(f"✓ esptool.py: v{esptool.__version__}")
+except ImportError:
+    esptool = None
     print("✗ esptool.py not found - run: pip install esptool")
 except Exception as e:
+    esptool = None
     print(f"✗ esptool.py error: {e}")
 
-# Check for PyQt6
-try:
-    import PyQt6
+# Check for PyQt6 (find_spec avoids loading the extension just to see it's there)
+if importlib.util.find_spec('PyQt6'):
     print(f"✓ PyQt6 installed")
-except ImportError:
+else:
     print("⚠ PyQt6 not installed - GUI won't work. Install: pip install PyQt6")
 
 # Check for pyudev (Linux only)
-try:
-    import pyudev
+if importlib.util.find_spec('pyudev'):
     print(f"✓ pyudev installed (hotplug detection)")
-except ImportError:
+else:
     print("⚠ pyudev not installed - will use polling fallback")
 
 # Check for devices
@@ -44,37 +42,47 @@ print("\n" + "=" * 60)
 print("Scanning for ESP32 devices...")
 print("=" * 60)
 
-from core import DeviceManager
-dm = DeviceManager()
-devices = dm.scan_devices()
+try:
+    from core import DeviceManager
+except ImportError as e:
+    DeviceManager = None
+    print(f"\n✗ Unable to load device manager: {e}")
+    print("  Install dependencies: pip install -r requirements.txt")
+
+devices = DeviceManager().scan_devices() if DeviceManager else None
+
+
+def probe(dev):
+    """Read chip type and MAC from one device, returning report lines."""
+    lines = [f"  - {dev}"]
+    if esptool is None:
+        return "\n".join(lines)
+
+    try:
+        esp = esptool.detect_chip(dev)
+        try:
+            lines.append(f"    Chip is {esp.get_chip_description()}")
+            lines.append(f"    MAC: {':'.join(f'{b:02x}' for b in esp.read_mac())}")
+        finally:
+            esp._port.close()
+    except Exception as e:
+        lines.append(f"    Unable to read chip info: {e}")
+
+    return "\n".join(lines)
+
 
 if devices:
     print(f"\n✓ Found {len(devices)} device(s):")
-    for dev in devices:
-        print(f"  - {dev}")
 
-        # Try to get chip info
-        try:
-            result = subprocess.run(
-                ['esptool.py', '--port', dev, 'chip_id'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            output = result.stdout + result.stderr
-
-            # Parse chip type
-            if 'Chip is' in output:
-                for line in output.split('\n'):
-                    if 'Chip is' in line:
-                        print(f"    {line.strip()}")
-            if 'MAC:' in output:
-                for line in output.split('\n'):
-                    if 'MAC:' in line:
-                        print(f"    {line.strip()}")
-        except Exception as e:
-            print(f"    Unable to read chip info: {e}")
-else:
+    # Serial handshakes are I/O bound, so probe all devices at once. esptool's
+    # connection chatter is discarded; map() keeps the report in device order.
+    with ThreadPoolExecutor(max_workers=min(32, len(devices))) as executor, \
+            contextlib.redirect_stdout(io.StringIO()):
+        reports = list(executor.map(probe, devices))
+
+    for report in reports:
+        print(report)
+elif devices is not None:
     print("\n✗ No devices found!")
     print("\nTroubleshooting:")
     print("  - Check if ESP32 is connected via USB")